@@ -1,16 +1,19 @@
+import copy
 import json
+import time
 from typing import List, Dict, Optional
-from ..config import AVAILABLE_SPORTS, PROCESSED_DATA_DIR, K_CHUNKS, MAX_LLM_TOKENS
+from ..config import AVAILABLE_SPORTS, PROCESSED_DATA_DIR, K_CHUNKS, MAX_LLM_TOKENS, FAQ_INDEX_PATH, EMBEDDING_MODEL
 from ..ingestion.vector_store import VectorStore
 from .memory import ConversationMemory
 from .llm_client import LLMClient
 from .rewriter import CombinedRewriter
+from .faq_index import FAQIndex, collection_version, resolve_chunks
 
 class RAGEngine:
-    def __init__(self):
+    def __init__(self, llm: Optional[LLMClient] = None):
         self.vector_store = VectorStore()
         self.collection = self.vector_store.get_collection()
-        self.llm = LLMClient()
+        self.llm = llm or LLMClient()
         self.memory = ConversationMemory()
         self.model = self.vector_store.embedding_fn
         
@@ -21,6 +24,11 @@ class RAGEngine:
         self.active_sport = None
         self.active_intent = None
         
+        # Per-stage latency (seconds) and outcome of the last chat() call
+        # last_error: None on success, else the LLMResult.error_type of the failed generation
+        self.last_timings = {}
+        self.last_error = None
+        
         # Load Parents Cache
         self.parents = {}
         parents_path = PROCESSED_DATA_DIR / "parents.json"
@@ -34,13 +42,40 @@ class RAGEngine:
         else:
             print("⚠️ parents.json not found. Hierarchy retrieval will not work.")
 
-    def retrieve_chunks_for_sport(self, query: str, sport: str, k: int = 5):
+        # Precomputed (sport, intent) FAQ index, only used if it matches the current collection
+        self.faq_index = None
+        if FAQ_INDEX_PATH.exists():
+            self.faq_index = FAQIndex.load(
+                FAQ_INDEX_PATH, collection_version(self.collection, self.parents, *self.embedding_signature())
+            )
+
+    def new_session(self) -> "RAGEngine":
+        """
+        New conversation sharing this engine's collection, model, LLM and caches
+        (no reload), with its own memory and sticky state.
+        """
+        session = copy.copy(self)
+        session.memory = ConversationMemory()
+        session.active_sport = None
+        session.active_intent = None
+        session.last_timings = {}
+        session.last_error = None
+        return session
+
+    def embedding_signature(self):
+        """(model name, dimension) of the query embeddings, part of the FAQ index version."""
+        return EMBEDDING_MODEL, len(self.embed_query("dimension probe"))
+
+    def embed_query(self, query: str) -> List[float]:
+        if hasattr(self.model, 'encode'):
+            return self.model.encode(query).tolist()
+        return [float(x) for x in self.model([query])[0]]
+
+    def retrieve_chunks_for_sport(self, query: str, sport: str, k: int = 5, query_embedding: Optional[List[float]] = None):
         try:
             # Generate embedding
-            if hasattr(self.model, 'encode'):
-                 query_embedding = self.model.encode(query).tolist()
-            else:
-                 query_embedding = self.model([query])[0]
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             
             n_retrieve = k * 3
             results = self.collection.query(
@@ -51,6 +86,7 @@ class RAGEngine:
             if not results['documents'] or not results['documents'][0]:
                 return []
             
+            ids = results['ids'][0]
             chunks = results['documents'][0]
             metadatas = results['metadatas'][0]
             distances = results['distances'][0]
@@ -58,7 +94,7 @@ class RAGEngine:
             filtered = []
             seen_parents = set()
             
-            for chunk, meta, dist in zip(chunks, metadatas, distances):
+            for chunk_id, chunk, meta, dist in zip(ids, chunks, metadatas, distances):
                 chunk_sports = meta.get('sport', '')
                 sport_list = [s.strip() for s in chunk_sports.split(',')]
                 
@@ -84,6 +120,7 @@ class RAGEngine:
                         filtered.append({
                             "content": parent_doc['full_content'], # FULL TEXT
                             "type": "parent",
+                            "parent_id": parent_id,
                             "sport": chunk_sports,
                             "package": parent_doc.get('package', 'Unknown'),
                             "similarity": similarity + 0.1 # Boost parents
@@ -93,6 +130,7 @@ class RAGEngine:
                     filtered.append({
                         "content": chunk,
                         "type": "chunk",
+                        "chunk_id": chunk_id,
                         "sport": chunk_sports,
                         "package": meta.get('source_file'),
                         "similarity": similarity
@@ -111,6 +149,10 @@ class RAGEngine:
 
     def chat(self, user_query: str):
         print(f"\n💬 User: {user_query}")
+        timings = {}
+        self.last_timings = timings
+        self.last_error = None
+        t_start = t = time.perf_counter()
         
         # 1. Combined Analysis (V3)
         analysis = self.rewriter.analyze_and_rewrite(
@@ -120,6 +162,8 @@ class RAGEngine:
             active_intent=self.active_intent
         )
         
+        timings['rewrite'] = time.perf_counter() - t
+        
         rewritten_query = analysis.get('rewritten_query', user_query)
         detected_sport = analysis.get('sport')
         detected_intent = analysis.get('intent')
@@ -136,10 +180,65 @@ class RAGEngine:
             
         print(f"📌 Current State -> Sport: {self.active_sport}, Intent: {self.active_intent}")
 
-        # 3. Retrieve
-        chunks = self.retrieve_chunks_for_sport(rewritten_query, self.active_sport, k=K_CHUNKS)
+        # 3. Retrieve (Precomputed FAQ index first, live pipeline as fallback)
+        t = time.perf_counter()
+        query_embedding = self.embed_query(rewritten_query)
+        timings['embed'] = time.perf_counter() - t
+        
+        t = time.perf_counter()
+        faq_hit = None
+        if self.faq_index:
+            faq_hit = self.faq_index.lookup(self.active_sport, self.active_intent, query_embedding)
+
+        if faq_hit and faq_hit.get('answer'):
+            print(f"⚡ FAQ index hit (answer): {self.active_sport}/{self.active_intent}")
+            self.memory.add_interaction(user_query, faq_hit['answer'])
+            timings['retrieve'] = time.perf_counter() - t
+            timings['total'] = time.perf_counter() - t_start
+            return faq_hit['answer']
+
+        chunks = []
+        if faq_hit:
+            print(f"⚡ FAQ index hit (retrieval): {self.active_sport}/{self.active_intent}")
+            chunks = resolve_chunks(faq_hit['chunks'], self.collection, self.parents)
+        if not chunks:
+            # Miss, or refs that no longer resolve: use the live pipeline
+            chunks = self.retrieve_chunks_for_sport(rewritten_query, self.active_sport, k=K_CHUNKS, query_embedding=query_embedding)
+        timings['retrieve'] = time.perf_counter() - t
         
         # 4. Build Context
+        context = self.build_context(chunks)
+
+        # 5. System Prompt (V3 Style)
+        system_prompt = self.build_system_prompt(context, self.active_sport, self.active_intent)
+        
+        # 6. Call LLM
+        messages = [{"role": "system", "content": system_prompt}]
+        # Add recent history for flow
+        for turn in self.memory.history[-2:]:
+             messages.append(turn)
+        messages.append({"role": "user", "content": rewritten_query}) # Feed rewritten query to LLM for clarity? Or original? V3 uses rewritten in prompt.
+        
+        t = time.perf_counter()
+        result = self.llm.generate(messages)
+        timings['generate'] = time.perf_counter() - t
+        timings['total'] = time.perf_counter() - t_start
+        if not result.ok:
+            # Don't store failures in memory as if they were real answers
+            # Callers check last_error; provider error text stays in the logs
+            self.last_error = result.error_type
+            print(f"❌ Generation failed ({result.error_type}): {result.error}")
+            if result.error_type in ("rate_limited", "circuit_open"):
+                return "ขออภัยค่ะ ขณะนี้มีผู้ใช้งานจำนวนมาก กรุณาลองใหม่อีกครั้งในภายหลัง"
+            return "ขออภัยค่ะ ระบบขัดข้องชั่วคราว กรุณาลองใหม่อีกครั้ง"
+        response = result.content
+        
+        # 7. Update Memory
+        self.memory.add_interaction(user_query, response)
+        
+        return response
+
+    def build_context(self, chunks: List[Dict]) -> str:
         context = ""
         for i, c in enumerate(chunks, 1):
              type_label = "📄 FULL PARENT" if c['type'] == 'parent' else "🧩 CHUNK"
@@ -149,13 +248,14 @@ class RAGEngine:
             # If no context found with lock, maybe try without lock or fallback? 
             # For now, strict as per user request.
             context = "ไม่พบข้อมูลที่เกี่ยวข้องในฐานข้อมูล"
+        return context
 
-        # 5. System Prompt (V3 Style)
-        sport_info = f"Active Sport: {self.active_sport}" if self.active_sport else "Active Sport: None (General)"
+    def build_system_prompt(self, context: str, sport: Optional[str], intent: Optional[str]) -> str:
+        sport_info = f"Active Sport: {sport}" if sport else "Active Sport: None (General)"
         
-        system_prompt = f"""คุณคือ 'SportBot' ผู้ช่วยแนะนำแพ็กเกจกีฬาที่เป็นมิตร
+        return f"""คุณคือ 'SportBot' ผู้ช่วยแนะนำแพ็กเกจกีฬาที่เป็นมิตร
 สถานะปัจจุบัน: {sport_info}
-หัวข้อที่คุยอยู่: {self.active_intent}
+หัวข้อที่คุยอยู่: {intent}
 
 CONTEXT:
 {context}
@@ -166,20 +266,6 @@ CONTEXT:
 3. สำหรับ ULTIMATE: ต้องบอกเสมอว่ามีครบทั้ง 5 กีฬา + Streaming Services (Netflix, Disney+, etc.)
 4. ตอบสั้นกระชับ เป็นธรรมชาติ (ภาษาไทย)
 """
-        
-        # 6. Call LLM
-        messages = [{"role": "system", "content": system_prompt}]
-        # Add recent history for flow
-        for turn in self.memory.history[-2:]:
-             messages.append(turn)
-        messages.append({"role": "user", "content": rewritten_query}) # Feed rewritten query to LLM for clarity? Or original? V3 uses rewritten in prompt.
-        
-        response = self.llm.generate(messages)
-        
-        # 7. Update Memory
-        self.memory.add_interaction(user_query, response)
-        
-        return response
 
     def set_sport(self, sport: str):
         # Manually force state
@@ -0,0 +1,205 @@
+import argparse
+import hashlib
+import json
+import math
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from ..config import (
+    FAQ_INDEX_PATH, FAQ_INTENTS, FAQ_MATCH_THRESHOLD, FILE_TO_SPORT_MAPPING, K_CHUNKS, SPORT_NAMES
+)
+
+def collection_version(collection, parents: Dict, embedding_model: str, embedding_dim: int) -> str:
+    """
+    Content hash of the vector collection (ids, documents, metadata) + parents cache
+    + embedding model/dimension (stored query embeddings are only comparable within one model).
+    Any re-ingestion that changes what retrieval can return changes the version.
+    """
+    data = collection.get(include=["documents", "metadatas"])
+    rows = sorted(zip(data["ids"], data["documents"], data["metadatas"]), key=lambda r: r[0])
+
+    h = hashlib.sha256()
+    h.update(f"{embedding_model}|{embedding_dim}".encode("utf-8"))
+    for row in rows:
+        h.update(json.dumps(row, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    h.update(json.dumps(parents, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+def faq_sports() -> List[str]:
+    """All sports reachable from FILE_TO_SPORT_MAPPING (+ MULTI for bundle packages)."""
+    sports = []
+    for mapping in FILE_TO_SPORT_MAPPING.values():
+        for sport in mapping["sports"]:
+            if sport not in sports:
+                sports.append(sport)
+        if mapping["is_multi_sport"] and "MULTI" not in sports:
+            sports.append("MULTI")
+    return sports
+
+def _entry_key(sport: Optional[str], intent: Optional[str]) -> str:
+    return f"{(sport or '').strip().upper()}|{(intent or '').strip().lower()}"
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+def chunk_ref(chunk: Dict) -> Dict:
+    """
+    Compact reference to a retrieved chunk: ids + scores only, never the text.
+    Content is looked up again from the collection/parents (covered by the version hash).
+    """
+    ref = {"type": chunk["type"], "sport": chunk["sport"], "similarity": round(chunk["similarity"], 4)}
+    if chunk["type"] == "parent":
+        ref["parent_id"] = chunk["parent_id"]
+    else:
+        ref["chunk_id"] = chunk["chunk_id"]
+    return ref
+
+def resolve_chunks(refs: List[Dict], collection, parents: Dict) -> List[Dict]:
+    """Turn stored refs back into retrieval results (same shape as RAGEngine.retrieve_chunks_for_sport)."""
+    chunk_ids = [r["chunk_id"] for r in refs if r["type"] == "chunk"]
+    by_id = {}
+    if chunk_ids:
+        data = collection.get(ids=chunk_ids, include=["documents", "metadatas"])
+        by_id = {i: (doc, meta) for i, doc, meta in zip(data["ids"], data["documents"], data["metadatas"])}
+
+    chunks = []
+    for ref in refs:
+        if ref["type"] == "parent":
+            parent_doc = parents.get(ref["parent_id"])
+            if not parent_doc:
+                continue
+            chunks.append({
+                "content": parent_doc['full_content'],
+                "type": "parent",
+                "parent_id": ref["parent_id"],
+                "sport": ref["sport"],
+                "package": parent_doc.get('package', 'Unknown'),
+                "similarity": ref["similarity"]
+            })
+        elif ref["chunk_id"] in by_id:
+            doc, meta = by_id[ref["chunk_id"]]
+            chunks.append({
+                "content": doc,
+                "type": "chunk",
+                "chunk_id": ref["chunk_id"],
+                "sport": ref["sport"],
+                "package": meta.get('source_file'),
+                "similarity": ref["similarity"]
+            })
+    return chunks
+
+class FAQIndex:
+    """
+    Precomputed retrieval results (and optional answers) per (sport, intent).
+    Stored as one compact JSON file, versioned against the collection contents.
+    Entry: {"query", "query_embedding", "chunks" (refs, see chunk_ref), "answer" (or None)}
+    """
+    def __init__(self, version: str, entries: Optional[Dict] = None):
+        self.version = version
+        self.entries = entries or {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, sport: str, intent: str, query: str, query_embedding: List[float], chunks: List[Dict], answer: Optional[str] = None):
+        if not chunks:
+            # An empty entry would be served as a "no data" context instead of falling back
+            return
+        self.entries[_entry_key(sport, intent)] = {
+            "query": query,
+            "query_embedding": [round(float(x), 6) for x in query_embedding],
+            "chunks": [chunk_ref(c) for c in chunks],
+            "answer": answer
+        }
+
+    def lookup(self, sport: Optional[str], intent: Optional[str], query_embedding: List[float], threshold: float = FAQ_MATCH_THRESHOLD) -> Optional[Dict]:
+        """
+        Return the entry for (sport, intent) if the query is close enough to its canonical query.
+        Returns None on miss, so callers fall back to the live pipeline.
+        """
+        if not sport or not intent:
+            return None
+        entry = self.entries.get(_entry_key(sport, intent))
+        if not entry:
+            return None
+        if len(query_embedding) != len(entry["query_embedding"]):
+            # Built with a different embedding model: never compare across models
+            return None
+        if _cosine(query_embedding, entry["query_embedding"]) < threshold:
+            return None
+        return entry
+
+    def save(self, path: Path = FAQ_INDEX_PATH):
+        payload = {"version": self.version, "created_at": time.time(), "entries": self.entries}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Path, expected_version: str) -> Optional["FAQIndex"]:
+        """Load the index; returns None if missing, unreadable or built for other collection contents."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Failed to load FAQ index: {e}")
+            return None
+
+        if payload.get("version") != expected_version:
+            print("⚠️ FAQ index is stale (collection changed). Rebuild it; using live pipeline.")
+            return None
+
+        index = cls(payload["version"], payload.get("entries", {}))
+        print(f"✅ Loaded FAQ index with {len(index)} (sport, intent) entries.")
+        return index
+
+def build_faq_index(engine, generate_answers: bool = False, k: int = K_CHUNKS) -> FAQIndex:
+    """
+    Offline job (run after ingestion): precompute retrieval (+ optional answers)
+    for every (sport, intent) pair using the engine's own retrieval and prompt.
+    """
+    index = FAQIndex(collection_version(engine.collection, engine.parents, *engine.embedding_signature()))
+
+    for sport in faq_sports():
+        sport_name = SPORT_NAMES.get(sport, [sport])[0]
+        for intent, template in FAQ_INTENTS.items():
+            query = template.format(sport=sport_name)
+            query_embedding = engine.embed_query(query)
+            chunks = engine.retrieve_chunks_for_sport(query, sport, k=k, query_embedding=query_embedding)
+            if not chunks:
+                # Nothing retrieved (or retrieval failed): leave the pair to the live pipeline
+                print(f"   ⏭️ {sport}/{intent}: no chunks, skipped")
+                continue
+
+            answer = None
+            if generate_answers:
+                system_prompt = engine.build_system_prompt(engine.build_context(chunks), sport, intent)
+                result = engine.llm.generate([
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query}
+                ])
+                if result.ok:
+                    answer = result.content
+                else:
+                    print(f"⚠️ Answer generation failed for {sport}/{intent}: {result.error}")
+
+            index.add(sport, intent, query, query_embedding, chunks, answer)
+            print(f"   📌 {sport}/{intent}: {len(chunks)} chunks{' + answer' if answer else ''}")
+
+    return index
+
+def main():
+    from .engine import RAGEngine
+
+    parser = argparse.ArgumentParser(description="Precompute the (sport, intent) FAQ index.")
+    parser.add_argument("--answers", action="store_true", help="Also pre-generate LLM answers")
+    args = parser.parse_args()
+
+    engine = RAGEngine()
+    index = build_faq_index(engine, generate_answers=args.answers)
+    index.save(FAQ_INDEX_PATH)
+    print(f"💾 Saved FAQ index ({len(index)} entries, version {index.version[:12]}) to {FAQ_INDEX_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,159 @@
+import hashlib
+import json
 import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+import openai
 from openai import OpenAI
+from ..config import (
+    LLM_TIMEOUT, LLM_RATE_LIMIT_RPS, LLM_RATE_LIMIT_BURST, LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE, LLM_BACKOFF_MAX, LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET
+)
+from .resilience import TokenBucket, CircuitBreaker, SingleFlight, backoff_delay
+
+# Errors worth retrying (throttling / transient provider issues)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+@dataclass(frozen=True)
+class LLMResult:
+    """
+    Structured LLM outcome. Callers check `ok` instead of parsing sentinel strings.
+    error_type: None | 'rate_limited' | 'timeout' | 'connection' | 'server' | 'circuit_open' | 'provider_error'
+    """
+    content: Optional[str] = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error_type is None
+
+def _error_type(e: Exception) -> str:
+    if isinstance(e, openai.RateLimitError):
+        return "rate_limited"
+    if isinstance(e, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(e, openai.APIConnectionError):
+        return "connection"
+    if isinstance(e, openai.InternalServerError):
+        return "server"
+    return "provider_error"
+
+def _retry_after(e: Exception) -> float:
+    """Seconds requested by the provider's Retry-After header (0 if absent)."""
+    response = getattr(e, "response", None)
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
 
 class LLMClient:
-    def __init__(self, api_key=None, base_url=None, model_name=None):
+    """
+    OpenAI-compatible client with a resilience layer:
+    1. Single-flight: identical concurrent requests share ONE provider call.
+    2. Token bucket: caps request rate to the provider.
+    3. Jittered exponential retry on throttling/transient errors.
+    4. Circuit breaker: fails fast while the provider is down.
+    """
+    def __init__(self, api_key=None, base_url=None, model_name=None, client=None):
+        """
+        client: optional provider client exposing chat.completions.create(...)
+        (e.g. a local fake for load tests); skips OpenAI() and its credential check.
+        """
         # 1. Try Standard OpenAI / Compatible API first
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.base_url = base_url or os.getenv("OPENAI_BASE_URL") # Generic Base URL support
         self.model_name = model_name or os.getenv("MODEL_NAME", "gpt-4o")
 
-        if not self.api_key:
-            print("⚠️ WARNING: No API Key found (OPENAI_API_KEY). LLM calls will fail.")
-            
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+        if client is not None:
+            self.client = client
+        else:
+            if not self.api_key:
+                print("⚠️ WARNING: No API Key found (OPENAI_API_KEY). LLM calls will fail.")
 
-    def generate(self, messages: list, max_tokens: int = 3000, temperature: float = 0.3):
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                timeout=60
+            # Retries are handled here, so disable the SDK's own retry loop
+            self.client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0
             )
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"❌ LLM Error: {e}")
-            return f"ขออภัยค่ะ ระบบขัดข้อง: {str(e)}"
+
+        self.rate_limiter = TokenBucket(LLM_RATE_LIMIT_RPS, LLM_RATE_LIMIT_BURST)
+        self.breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET)
+        self.single_flight = SingleFlight()
+        self.max_retries = LLM_MAX_RETRIES
+
+        # generate() calls (before single-flight), to compare against provider calls
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+
+    def generate(self, messages: list, max_tokens: int = 3000, temperature: float = 0.3) -> LLMResult:
+        with self._requests_lock:
+            self.requests += 1
+
+        key = hashlib.sha256(json.dumps(
+            [self.model_name, messages, max_tokens, temperature],
+            ensure_ascii=False, sort_keys=True
+        ).encode("utf-8")).hexdigest()
+
+        return self.single_flight.do(key, lambda: self._generate_guarded(messages, max_tokens, temperature))
+
+    def _generate_guarded(self, messages: list, max_tokens: int, temperature: float) -> LLMResult:
+        # Breaker is consulted and updated ONCE per request, not per retry attempt
+        if not self.breaker.allow():
+            print("❌ LLM Error: circuit open, skipping provider call")
+            return LLMResult(error="LLM provider unavailable (circuit open)", error_type="circuit_open")
+
+        result = None
+        try:
+            result = self._generate_with_retry(messages, max_tokens, temperature)
+        finally:
+            if result is None or result.error_type == "rate_limited":
+                # 429 means the provider is up (just throttling us): don't count it against the breaker
+                self.breaker.release()
+            elif result.error_type in ("timeout", "connection", "server"):
+                self.breaker.record_failure()
+            else:
+                # Success or non-retryable error (bad request, auth, ...): the provider answered
+                self.breaker.record_success()
+        return result
+
+    def _generate_with_retry(self, messages: list, max_tokens: int, temperature: float) -> LLMResult:
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            attempt += 1
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    timeout=LLM_TIMEOUT
+                )
+                return LLMResult(content=response.choices[0].message.content or "", attempts=attempt)
+            except RETRYABLE_ERRORS as e:
+                if attempt > self.max_retries:
+                    print(f"❌ LLM Error (giving up after {attempt} attempts): {e}")
+                    return LLMResult(error=str(e), error_type=_error_type(e), attempts=attempt)
+                retry_after = _retry_after(e)
+                if retry_after > LLM_BACKOFF_MAX:
+                    # Don't park this worker (and every single-flight follower) for minutes
+                    print(f"❌ LLM Error (Retry-After {retry_after:.0f}s exceeds {LLM_BACKOFF_MAX}s): {e}")
+                    return LLMResult(error=str(e), error_type=_error_type(e), attempts=attempt)
+                delay = max(backoff_delay(attempt - 1, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX), retry_after)
+                print(f"⚠️ LLM {_error_type(e)} (attempt {attempt}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+            except Exception as e:
+                print(f"❌ LLM Error: {e}")
+                return LLMResult(error=str(e), error_type=_error_type(e), attempts=attempt)
@@ -73,8 +73,10 @@ New Summary:"""
 
         try:
              # This is a synchronous call to LLM
-             response = llm_client.generate([{"role": "user", "content": prompt}])
-             self.summary = response.strip()
+             result = llm_client.generate([{"role": "user", "content": prompt}])
+             if not result.ok:
+                 raise RuntimeError(f"LLM {result.error_type}: {result.error}")
+             self.summary = result.content.strip()
              print(f"🧠 Memory Summarized: {self.summary[:50]}...")
         except Exception as e:
             print(f"⚠️ Summarization failed: {e}")
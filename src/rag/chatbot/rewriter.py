@@ -53,12 +53,14 @@ class CombinedRewriter:
         
         try:
             # We use a simple one-shot call
-            response = self.llm.generate([
+            result = self.llm.generate([
                 {"role": "user", "content": combined_prompt}
             ])
+            if not result.ok:
+                raise RuntimeError(f"LLM {result.error_type}: {result.error}")
             
             # Clean response to ensure JSON
-            response = response.strip()
+            response = result.content.strip()
             if "```json" in response:
                 response = response.split("```json")[1].split("```")[0].strip()
             elif "```" in response:
@@ -18,10 +18,32 @@ PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
 
 # ===== RAG SETTINGS =====
+EMBEDDING_MODEL = "intfloat/multilingual-e5-base"
 K_CHUNKS = 5
 MAX_LLM_TOKENS = 3000
 CHUNK_SIZE = 3000
-CHUNK_OVERLAP = 800
+CHUNK_OVERLAP = 200  # Only applied when a single section exceeds CHUNK_SIZE
+
+# ===== LLM CLIENT (Resilience) =====
+LLM_TIMEOUT = 60
+LLM_RATE_LIMIT_RPS = float(os.getenv("LLM_RATE_LIMIT_RPS", "5"))  # <= 0 disables the limiter
+LLM_RATE_LIMIT_BURST = 10
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_BASE = 0.5  # seconds
+LLM_BACKOFF_MAX = 8.0
+LLM_BREAKER_THRESHOLD = 5  # consecutive failures before the circuit opens
+LLM_BREAKER_RESET = 30.0  # seconds before a half-open probe
+
+# ===== PRECOMPUTED FAQ INDEX =====
+FAQ_INDEX_PATH = PROCESSED_DATA_DIR / "faq_index.json"
+FAQ_MATCH_THRESHOLD = 0.92  # cosine similarity between rewritten and canonical query
+
+# Canonical query per intent (the rewriter's `intent` values); {sport} = product name
+FAQ_INTENTS = {
+    "pricing": "ราคาแพ็กเกจ {sport} เท่าไหร่",
+    "promo": "โปรโมชั่นของแพ็กเกจ {sport} มีอะไรบ้าง",
+    "support": "ติดต่อฝ่ายบริการลูกค้าหรือแจ้งปัญหาการใช้งานแพ็กเกจ {sport} ได้อย่างไร"
+}
 
 # ===== SPORT MAPPINGS =====
 AVAILABLE_SPORTS = {
@@ -1,20 +1,64 @@
 from pathlib import Path
 import json
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from ..config import CHUNK_SIZE, CHUNK_OVERLAP, FILE_TO_SPORT_MAPPING, PROCESSED_DATA_DIR
 from .cleaner import clean_text, extract_structure_metadata, flatten_metadata
 from .hierarchy import create_parent_child_data
+from .sections import parse_sections, section_headers, split_span, trim_span
 
 class MarkdownChunker:
+    """
+    Structural Markdown chunker.
+    Parses the ##/### tree once and emits chunks aligned to sections,
+    with character offsets into the cleaned source. Small sibling sections under the
+    same ## are packed together; only sections larger than chunk_size are split (with overlap).
+    """
     def __init__(self, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            separators=["\n## ", "\n### ", "\n\n", "\n", "。", ". ", " ", ""],
-            length_function=len
-        )
+
+    def split_text(self, text: str):
+        """
+        Split text into section-aligned spans.
+        Returns: list of {"start", "end", "path"} where text[start:end] is the chunk
+        and path lists every (level, title) header the chunk falls under.
+        """
+        spans = []
+        group = None  # Span being packed: {"start", "end", "path", "h2"}
+
+        def flush():
+            if group:
+                start, end = trim_span(text, group["start"], group["end"])
+                if start < end:
+                    spans.append({"start": start, "end": end, "path": group["path"]})
+
+        for section in parse_sections(text):
+            h2 = tuple(p for p in section["path"] if p[0] == 2)
+            size = section["end"] - section["start"]
+
+            if size > self.chunk_size:
+                flush()
+                group = None
+                for start, end in split_span(text, section["start"], section["end"],
+                                             self.chunk_size, self.chunk_overlap):
+                    start, end = trim_span(text, start, end)
+                    if start < end:
+                        spans.append({"start": start, "end": end, "path": list(section["path"])})
+                continue
+
+            if group and group["h2"] == h2 and section["end"] - group["start"] <= self.chunk_size:
+                group["end"] = section["end"]
+                for p in section["path"]:
+                    if p not in group["path"]:
+                        group["path"].append(p)
+            else:
+                flush()
+                group = {"start": section["start"], "end": section["end"],
+                         "path": list(section["path"]), "h2": h2}
+
+        flush()
+        return spans
 
     def process_file(self, filepath: Path):
         """
@@ -51,15 +95,20 @@ class MarkdownChunker:
             return [], None
 
         clean_content = clean_text(content)
-        chunks = self.splitter.split_text(clean_content)
+        chunks = self.split_text(clean_content)
         
         chunk_data = []
         file_base = filename.replace("final_", "").replace(".md", "")
 
-        for i, chunk in enumerate(chunks):
-            # Reclean chunk just in case
-            clean_ck = clean_text(chunk)
-            struct_meta = extract_structure_metadata(clean_ck)
+        for i, span in enumerate(chunks):
+            # Offsets index into the cleaned content, so no re-cleaning here
+            clean_ck = clean_content[span["start"]:span["end"]]
+            struct_meta = extract_structure_metadata(clean_ck, include_headers=False)
+            headers_h2, headers_h3 = section_headers(span["path"])
+            if headers_h2:
+                struct_meta["headers_h2"] = headers_h2
+            if headers_h3:
+                struct_meta["headers_h3"] = headers_h3
             
             metadata = {
                 "sport": sport_string,
@@ -67,6 +116,8 @@ class MarkdownChunker:
                 "is_multi_sport": is_multi,
                 "chunk_index": i,
                 "total_chunks": len(chunks),
+                "start_offset": span["start"],
+                "end_offset": span["end"],
                 **struct_meta
             }
             
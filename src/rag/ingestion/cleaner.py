@@ -12,20 +12,22 @@ def clean_text(text):
     text = text.replace('\r\n', '\n').replace('\t', ' ')
     return text.strip()
 
-def extract_structure_metadata(chunk):
+def extract_structure_metadata(chunk, include_headers=True):
     """
     Extract headers and bold text from a text chunk.
+    Pass include_headers=False when headers are already known from the section tree.
     """
     metadata = {}
     
     # Extract headers
-    headers_h2 = re.findall(r'^##\s+(.+)$', chunk, re.MULTILINE)
-    headers_h3 = re.findall(r'^###\s+(.+)$', chunk, re.MULTILINE)
-    
-    if headers_h2:
-        metadata["headers_h2"] = headers_h2
-    if headers_h3:
-        metadata["headers_h3"] = headers_h3
+    if include_headers:
+        headers_h2 = re.findall(r'^##\s+(.+)$', chunk, re.MULTILINE)
+        headers_h3 = re.findall(r'^###\s+(.+)$', chunk, re.MULTILINE)
+        
+        if headers_h2:
+            metadata["headers_h2"] = headers_h2
+        if headers_h3:
+            metadata["headers_h3"] = headers_h3
     
     # Extract bold text (first 10)
     bold_text = re.findall(r'\*\*([^*]+)\*\*', chunk)
@@ -1,5 +1,6 @@
 from pathlib import Path
 from ..config import FILE_TO_SPORT_MAPPING
+from .sections import parse_sections
 
 def create_parent_child_data(filepath: Path):
     """
@@ -24,11 +25,17 @@ def create_parent_child_data(filepath: Path):
     parent_id = f"{package_name}_parent"
     
     # 1. Create Parent (Full File)
+    # Section offsets let callers excerpt full_content without re-reading or re-parsing the file
+    sections = [
+        {"start": s["start"], "end": s["end"], "level": s["level"], "title": s["title"]}
+        for s in parse_sections(full_content)
+    ]
     parent_doc = {
         "id": parent_id,
         "package": package_name,
         "full_content": full_content,
-        "sports": mapping["sports"]
+        "sports": mapping["sports"],
+        "sections": sections
     }
 
     # 2. Create Children (Manual Logic from original notebook)
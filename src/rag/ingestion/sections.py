@@ -0,0 +1,123 @@
+import re
+
+# Title must sit on the header line ([ \t], not \s); closing #'s only stripped after whitespace ("## C#" keeps its #)
+HEADER_PATTERN = re.compile(r'^(#{1,3})[ \t]+(.+?)(?:[ \t]+#+)?[ \t]*$')
+FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+
+def iter_headers(text):
+    """
+    Yield (offset, level, title) for every #, ## and ### header line,
+    skipping lines inside fenced code blocks (``` or ~~~).
+    """
+    fence = None
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        fence_match = FENCE_PATTERN.match(stripped)
+        if fence:
+            # Closing fence: same char, at least as long, nothing else on the line
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence) \
+                    and not stripped[fence_match.end():].strip():
+                fence = None
+        elif fence_match:
+            fence = fence_match.group(1)
+        else:
+            match = HEADER_PATTERN.match(stripped)
+            if match:
+                yield offset, len(match.group(1)), match.group(2).strip()
+        offset += len(line)
+
+def parse_sections(text):
+    """
+    Parse the markdown header tree (#, ##, ###) in ONE pass.
+    Returns a flat list of leaf sections in document order:
+    [{"start", "end", "level", "title", "path": [(level, title), ...]}, ...]
+    Offsets index directly into `text` (text[start:end] is the section body incl. its header).
+    Text before the first header becomes a level-0 preamble section with an empty path.
+    Headers inside fenced code blocks are ignored.
+    """
+    sections = []
+    stack = []  # [(level, title)] of open ancestors
+    prev_start, prev_level, prev_title, prev_path = 0, 0, "", []
+
+    for header_start, level, title in iter_headers(text):
+        if header_start > prev_start or prev_level:
+            sections.append({
+                "start": prev_start,
+                "end": header_start,
+                "level": prev_level,
+                "title": prev_title,
+                "path": prev_path
+            })
+
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+
+        prev_start, prev_level, prev_title, prev_path = header_start, level, title, list(stack)
+
+    if len(text) > prev_start or prev_level:
+        sections.append({
+            "start": prev_start,
+            "end": len(text),
+            "level": prev_level,
+            "title": prev_title,
+            "path": prev_path
+        })
+
+    return sections
+
+def section_headers(path):
+    """
+    Split a section path into its ## and ### titles.
+    """
+    headers_h2 = [title for level, title in path if level == 2]
+    headers_h3 = [title for level, title in path if level == 3]
+    return headers_h2, headers_h3
+
+def trim_span(text, start, end):
+    """
+    Shrink [start, end) so it excludes leading/trailing whitespace.
+    """
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+def split_span(text, start, end, chunk_size, chunk_overlap):
+    """
+    Split an oversized span into windows of at most `chunk_size` characters.
+    Cuts prefer paragraph, then line, then word boundaries.
+    Only these forced splits overlap, by up to `chunk_overlap` characters snapped to a line/word start.
+    """
+    windows = []
+    pos = start
+
+    while pos < end:
+        stop = min(pos + chunk_size, end)
+        if stop < end:
+            floor = pos + chunk_size // 2
+            for sep in ("\n\n", "\n", " "):
+                cut = text.rfind(sep, floor, stop)
+                if cut != -1:
+                    stop = cut + len(sep)
+                    break
+
+        windows.append((pos, stop))
+        if stop >= end:
+            break
+
+        if not chunk_overlap:
+            pos = stop
+            continue
+
+        next_pos = max(stop - chunk_overlap, pos + 1)
+        for sep in ("\n", " "):
+            boundary = text.find(sep, next_pos, stop - 1)
+            if boundary != -1:
+                next_pos = boundary + 1
+                break
+        pos = next_pos
+
+    return windows
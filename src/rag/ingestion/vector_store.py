@@ -1,13 +1,13 @@
 import chromadb
 from chromadb.utils import embedding_functions
-from ..config import VECTOR_DB_DIR
+from ..config import VECTOR_DB_DIR, EMBEDDING_MODEL
 from .cleaner import flatten_metadata
 
 class VectorStore:
     def __init__(self, persist_directory=VECTOR_DB_DIR):
         self.persist_directory = str(persist_directory)
         self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="intfloat/multilingual-e5-base"
+            model_name=EMBEDDING_MODEL
         )
         self.client = chromadb.PersistentClient(path=self.persist_directory)
         self.collection = self.client.get_or_create_collection(
@@ -0,0 +1,299 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from .fake_llm import FakeChatCompletions, LatencyModel, fake_openai_client
+
+STAGES = ["rewrite", "embed", "retrieve", "generate", "total"]
+
+# Synthetic multi-turn sessions: first turn locks the sport, follow-ups rely on sticky state
+DEFAULT_SESSIONS = [
+    ["แพ็กเกจ NBA มีอะไรบ้าง", "ราคาเท่าไหร่", "มีโปรโมชั่นไหม"],
+    ["อยากดูบาสเก็ตบอล", "ราคาเท่าไหร่", "ดูผ่านมือถือได้ไหม", "ติดต่อเจ้าหน้าที่ยังไง"],
+    ["แพ็กเกจ ULTIMATE ดูกีฬาอะไรได้บ้าง", "ราคาเท่าไหร่", "มี Netflix ด้วยไหม"],
+    ["ULTIMATE มีโปรอะไรบ้าง", "แล้ว NBA ล่ะ", "ราคาเท่าไหร่"],
+    ["สมัครแพ็กเกจกีฬายังไง", "ราคาเท่าไหร่", "ยกเลิกได้ไหม"],
+]
+
+# Per-session wording variants (polite particles) for synthetic sessions
+PARTICLES = ["", "ครับ", "ค่ะ", "หน่อยครับ", "นะคะ"]
+
+def vary_session(turns: List[str], session_no: int) -> List[str]:
+    """
+    Make a synthetic session unique: particle variant + customer tag on every turn.
+    Otherwise sessions on the same script send identical prompts, single-flight merges them,
+    and the run measures merging instead of what the node sustains.
+    """
+    particle = PARTICLES[session_no % len(PARTICLES)]
+    suffix = f" {particle}" if particle else ""
+    return [f"{turn}{suffix} [ลูกค้า #{session_no}]" for turn in turns]
+
+def load_sessions(path: Path) -> List[List[str]]:
+    """Replay sessions from JSONL: one {"turns": ["...", "..."]} per line."""
+    sessions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                sessions.append(json.loads(line)["turns"])
+    return sessions
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+class InProcessTarget:
+    """
+    Drives RAGEngine.chat directly. Each session gets engine.new_session(),
+    so sticky active_sport/active_intent and memory evolve per conversation.
+    """
+    def __init__(self, engine, completions=None):
+        self.engine = engine
+        self.completions = completions
+
+    def llm_counts(self):
+        """(LLM requests, provider calls) so far; provider calls need the fake provider."""
+        provider_calls = self.completions.calls if self.completions is not None else None
+        return self.engine.llm.requests, provider_calls
+
+    def start_session(self):
+        return self.engine.new_session()
+
+    def turn(self, session, message: str):
+        session.chat(message)
+        return session.last_error is None, dict(session.last_timings)
+
+class HTTPTarget:
+    """
+    Drives a chat endpoint over HTTP.
+    Contract: POST {"session_id", "message"} -> JSON; optional "timings" {stage: seconds} in the reply.
+    """
+    def __init__(self, url: str, timeout: float = 120):
+        self.url = url
+        self.timeout = timeout
+
+    def start_session(self):
+        return str(uuid.uuid4())
+
+    def turn(self, session, message: str):
+        body = json.dumps({"session_id": session, "message": message}, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        t = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode("utf-8") or "{}")
+        except Exception:
+            return False, {"total": time.perf_counter() - t}
+        timings = dict(payload.get("timings") or {})
+        timings["total"] = time.perf_counter() - t
+        return True, timings
+
+class _Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {stage: [] for stage in STAGES}
+        self.queue_wait = []
+        self.turns = 0
+        self.errors = 0
+        self.sessions = 0
+
+    def record_turn(self, ok: bool, timings: Dict):
+        with self.lock:
+            self.turns += 1
+            if not ok:
+                self.errors += 1
+            for stage, value in timings.items():
+                self.stages.setdefault(stage, []).append(value)
+
+def _run_session(target, turns: List[str], recorder: _Recorder, think_time: float):
+    session = target.start_session()
+    for i, message in enumerate(turns):
+        if i and think_time:
+            time.sleep(random.expovariate(1 / think_time))
+        try:
+            ok, timings = target.turn(session, message)
+        except Exception:
+            ok, timings = False, {}
+        recorder.record_turn(ok, timings)
+    with recorder.lock:
+        recorder.sessions += 1
+
+def run_load(target, sessions: List[List[str]], num_sessions: int, concurrency: Optional[int] = None,
+             arrival_rate: Optional[float] = None, think_time: float = 0.0, max_workers: int = 256,
+             unique_sessions: bool = False) -> Dict:
+    """
+    Run `num_sessions` conversations (sampled from `sessions`) against `target`.
+    - Closed loop: `concurrency` conversations in flight at all times.
+    - Open loop: conversations arrive as a Poisson process at `arrival_rate`/s
+      (queue wait is reported, which is where saturation shows up).
+    unique_sessions: vary each sampled session's wording (see vary_session).
+    """
+    recorder = _Recorder()
+    picks = [random.choice(sessions) for _ in range(num_sessions)]
+    if unique_sessions:
+        picks = [vary_session(turns, n) for n, turns in enumerate(picks)]
+    counts_before = target.llm_counts() if hasattr(target, "llm_counts") else None
+    t_start = time.perf_counter()
+
+    if arrival_rate:
+        def job(turns, submitted):
+            recorder.queue_wait.append(time.perf_counter() - submitted)
+            _run_session(target, turns, recorder, think_time)
+
+        with ThreadPoolExecutor(max_workers=concurrency or max_workers) as pool:
+            for turns in picks:
+                pool.submit(job, turns, time.perf_counter())
+                time.sleep(random.expovariate(arrival_rate))
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency or 1) as pool:
+            for turns in picks:
+                pool.submit(_run_session, target, turns, recorder, think_time)
+
+    elapsed = time.perf_counter() - t_start
+    report = {
+        "concurrency": concurrency,
+        "arrival_rate": arrival_rate,
+        "sessions": recorder.sessions,
+        "turns": recorder.turns,
+        "errors": recorder.errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_turns_per_s": round(recorder.turns / elapsed, 3) if elapsed else 0.0,
+        "throughput_sessions_per_s": round(recorder.sessions / elapsed, 3) if elapsed else 0.0,
+        "latency_s": {
+            stage: {
+                "mean": round(sum(values) / len(values), 4),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4)
+            }
+            for stage, values in recorder.stages.items() if values
+        }
+    }
+    if recorder.queue_wait:
+        report["queue_wait_p95_s"] = round(percentile(recorder.queue_wait, 95), 4)
+    if counts_before:
+        requests, provider_calls = target.llm_counts()
+        report["llm_requests"] = requests - counts_before[0]
+        if provider_calls is not None:
+            report["provider_calls"] = provider_calls - counts_before[1]
+            # < 1: single-flight merged requests; > 1: retries
+            report["provider_calls_per_request"] = (
+                round(report["provider_calls"] / report["llm_requests"], 3) if report["llm_requests"] else 0.0
+            )
+    return report
+
+def find_saturation(reports: List[Dict], min_gain: float = 0.1) -> Optional[Dict]:
+    """
+    First load level after which throughput grows by less than `min_gain` (relative)
+    while the next level's p95 total latency keeps rising. None if throughput still scales.
+    """
+    for prev, cur in zip(reports, reports[1:]):
+        prev_tp = prev["throughput_turns_per_s"]
+        gain = (cur["throughput_turns_per_s"] - prev_tp) / prev_tp if prev_tp else 0.0
+        prev_p95 = prev["latency_s"].get("total", {}).get("p95", 0.0)
+        cur_p95 = cur["latency_s"].get("total", {}).get("p95", 0.0)
+        if gain < min_gain and cur_p95 > prev_p95:
+            return prev
+    return None
+
+def print_report(report: Dict):
+    level = f"concurrency={report['concurrency']}" if not report["arrival_rate"] else f"arrival={report['arrival_rate']}/s"
+    print(f"\n📊 {level}: {report['turns']} turns / {report['sessions']} sessions in {report['elapsed_s']}s "
+          f"-> {report['throughput_turns_per_s']} turns/s, errors={report['errors']}")
+    for stage, stats in report["latency_s"].items():
+        print(f"   {stage:<9} mean={stats['mean']:.3f}s p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s p99={stats['p99']:.3f}s")
+    if "provider_calls_per_request" in report:
+        print(f"   llm       {report['llm_requests']} requests -> {report['provider_calls']} provider calls "
+              f"({report['provider_calls_per_request']} per request)")
+    if "queue_wait_p95_s" in report:
+        print(f"   queue     p95={report['queue_wait_p95_s']:.3f}s")
+
+def build_in_process_target(completions: FakeChatCompletions) -> InProcessTarget:
+    """
+    Real engine + real LLMClient; only the provider call is faked, so rate limiting,
+    retries and the circuit breaker shape the measured latency and saturation.
+    """
+    from ..chatbot.engine import RAGEngine
+    from ..chatbot.llm_client import LLMClient
+
+    # Injected provider client: no OPENAI_API_KEY needed
+    engine = RAGEngine(llm=LLMClient(client=fake_openai_client(completions)))
+    return InProcessTarget(engine, completions)
+
+def sessions_for_level(num_sessions: int, concurrency: Optional[int] = None, arrival_rate: Optional[float] = None) -> int:
+    """
+    Scale the session count with load so every level reaches steady state:
+    >= 4 sessions per concurrent slot (closed loop) or >= 10s of arrivals (open loop).
+    """
+    if arrival_rate:
+        return max(num_sessions, int(10 * arrival_rate))
+    return max(num_sessions, 4 * (concurrency or 1))
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test RAGEngine.chat with multi-turn Thai sessions.")
+    parser.add_argument("--url", help="HTTP chat endpoint (default: drive the engine in-process)")
+    parser.add_argument("--sessions", type=Path, help="JSONL of {\"turns\": [...]} to replay (default: synthetic)")
+    parser.add_argument("--num-sessions", type=int, default=50, help="Minimum sessions per level (scaled up with load)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated closed-loop levels to sweep")
+    parser.add_argument("--arrival-rates", help="Comma-separated open-loop session arrival rates (per second) to sweep")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds between turns")
+    parser.add_argument("--rewrite-latency", default="lognormal:0.4,0.5", help="Fake LLM latency for the rewriter call")
+    parser.add_argument("--answer-latency", default="lognormal:1.2,0.5", help="Fake LLM latency for the answer call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability the fake provider raises a 429")
+    parser.add_argument("--output", type=Path, help="Write the JSON reports here")
+    parser.add_argument("--verbose", action="store_true", help="Keep engine logging")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.sessions) if args.sessions else DEFAULT_SESSIONS
+
+    if args.url:
+        target = HTTPTarget(args.url)
+    else:
+        completions = FakeChatCompletions(
+            rewrite_latency=LatencyModel.parse(args.rewrite_latency),
+            answer_latency=LatencyModel.parse(args.answer_latency),
+            error_rate=args.error_rate
+        )
+        target = build_in_process_target(completions)
+
+    # Replayed traffic is sent as recorded; synthetic scripts are made unique per session
+
+    if args.arrival_rates:
+        levels = [{"arrival_rate": float(r)} for r in args.arrival_rates.split(",")]
+    else:
+        levels = [{"concurrency": int(c)} for c in args.concurrency.split(",")]
+
+    reports = []
+    for level in levels:
+        with open(os.devnull, 'w') as devnull, contextlib.ExitStack() as stack:
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            report = run_load(target, sessions, sessions_for_level(args.num_sessions, **level),
+                              think_time=args.think_time, unique_sessions=not args.sessions, **level)
+        print_report(report)
+        reports.append(report)
+
+    saturation = find_saturation(reports)
+    if saturation:
+        level = saturation["concurrency"] or f"{saturation['arrival_rate']}/s"
+        print(f"\n🚧 Saturation at {level}: ~{saturation['throughput_turns_per_s']} turns/s; higher load only adds latency.")
+    else:
+        print("\n✅ Throughput still scaling at the highest level tested.")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"reports": reports, "saturation": saturation}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Saved reports to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+import openai
+from ..config import SPORT_NAMES
+
+# Thai/English keywords -> rewriter intent
+INTENT_KEYWORDS = {
+    "pricing": ["ราคา", "เท่าไหร่", "กี่บาท", "ค่าบริการ", "price"],
+    "promo": ["โปร", "ส่วนลด", "promo"],
+    "support": ["ติดต่อ", "ปัญหา", "ยกเลิก", "support"]
+}
+
+REWRITER_MARKER = "Rewriter & Analyzer"
+QUESTION_PATTERN = re.compile(r'คำถามปัจจุบัน: "(.*)"')
+SPORT_LOCK_PATTERN = re.compile(r'Sport Lock: (\S+)')
+
+class LatencyModel:
+    """
+    Configurable latency distribution (seconds).
+    - constant: always `mean`
+    - uniform: between `low` and `high`
+    - lognormal: median `mean`, shape `sigma` (long tail like real providers)
+    Spec string: "constant:0.8", "uniform:0.3,1.5", "lognormal:0.8,0.5"
+    """
+    def __init__(self, kind: str = "lognormal", mean: float = 0.8, sigma: float = 0.5, low: float = 0.0, high: float = 0.0):
+        self.kind = kind
+        self.mean = mean
+        self.sigma = sigma
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v]
+        if kind == "constant":
+            return cls("constant", mean=values[0] if values else 0.0)
+        if kind == "uniform":
+            return cls("uniform", low=values[0], high=values[1])
+        if kind == "lognormal":
+            return cls("lognormal", mean=values[0], sigma=values[1] if len(values) > 1 else 0.5)
+        raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "constant":
+            return self.mean
+        if self.kind == "uniform":
+            return random.uniform(self.low, self.high)
+        return random.lognormvariate(0, self.sigma) * self.mean
+
+def _completion(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def _rate_limit_error():
+    # Minimal stand-in for the SDK's HTTP response; no Retry-After, so LLMClient uses its own backoff
+    response = SimpleNamespace(status_code=429, headers={}, request=None)
+    return openai.RateLimitError("Fake rate limit (429)", response=response, body=None)
+
+class FakeChatCompletions:
+    """
+    Local stand-in for the provider's `chat.completions` endpoint.
+    Only the provider call is faked: plugged into a real LLMClient, requests still go through
+    single-flight, the token bucket, retry/backoff and the circuit breaker.
+    Sleeps a sampled latency, answers rewriter prompts with keyword-based JSON and
+    answer prompts with a canned reply. `error_rate` raises openai.RateLimitError (429).
+    """
+    def __init__(self, rewrite_latency: LatencyModel = None, answer_latency: LatencyModel = None, error_rate: float = 0.0):
+        self.rewrite_latency = rewrite_latency or LatencyModel("lognormal", mean=0.4)
+        self.answer_latency = answer_latency or LatencyModel("lognormal", mean=1.2)
+        self.error_rate = error_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, model: str = None, messages: list = None, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+        prompt = messages[-1]["content"]
+        is_rewrite = REWRITER_MARKER in prompt
+        time.sleep((self.rewrite_latency if is_rewrite else self.answer_latency).sample())
+
+        if self.error_rate and random.random() < self.error_rate:
+            raise _rate_limit_error()
+
+        if is_rewrite:
+            return _completion(self._rewrite(prompt))
+        return _completion(f"(fake) คำตอบสำหรับ: {prompt[:80]}")
+
+    def _rewrite(self, prompt: str) -> str:
+        match = QUESTION_PATTERN.search(prompt)
+        question = match.group(1) if match else prompt
+        upper = question.upper()
+
+        sport = None
+        for code, names in SPORT_NAMES.items():
+            if any(name.upper() in upper for name in names):
+                sport = code
+                break
+        for code in ("EPL", "NFL", "TENNIS", "GOLF"):
+            if sport is None and code in upper:
+                sport = code
+
+        intent = None
+        for name, keywords in INTENT_KEYWORDS.items():
+            if any(k in question.lower() for k in keywords):
+                intent = name
+                break
+
+        # Follow-ups inherit the sticky sport, like the real rewriter
+        rewritten = question
+        lock = SPORT_LOCK_PATTERN.search(prompt)
+        if sport is None and lock and lock.group(1) != "None":
+            rewritten = f"{question} ({lock.group(1)})"
+
+        return json.dumps({
+            "rewritten_query": rewritten,
+            "sport": sport or "None",
+            "intent": intent or "None",
+            "is_followup": sport is None
+        }, ensure_ascii=False)
+
+def fake_openai_client(completions: FakeChatCompletions):
+    """Object shaped like OpenAI() for LLMClient.client: client.chat.completions.create(...)."""
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
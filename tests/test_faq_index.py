@@ -0,0 +1,73 @@
+import json
+
+from rag.chatbot.faq_index import FAQIndex, chunk_ref, collection_version, resolve_chunks
+
+PARENTS = {"ultimate_parent": {"id": "ultimate_parent", "package": "ultimate", "full_content": "FULL ULTIMATE TEXT " * 200}}
+
+class FakeCollection:
+    def __init__(self, rows):
+        self.rows = rows  # id -> (document, metadata)
+
+    def get(self, ids=None, include=None):
+        ids = [i for i in (ids or self.rows) if i in self.rows]
+        return {
+            "ids": ids,
+            "documents": [self.rows[i][0] for i in ids],
+            "metadatas": [self.rows[i][1] for i in ids],
+        }
+
+COLLECTION = FakeCollection({
+    "nba_package_chunk_0": ("NBA 299 THB/month", {"sport": "NBA", "source_file": "nba_package.md"}),
+    "multi_child_ultimate_NBA": ("child", {"sport": "NBA", "parent_id": "ultimate_parent"}),
+})
+
+RETRIEVED = [
+    {"content": PARENTS["ultimate_parent"]["full_content"], "type": "parent", "parent_id": "ultimate_parent",
+     "sport": "NBA", "package": "ultimate", "similarity": 0.91234567},
+    {"content": "NBA 299 THB/month", "type": "chunk", "chunk_id": "nba_package_chunk_0",
+     "sport": "NBA", "package": "nba_package.md", "similarity": 0.8},
+]
+
+def test_refs_do_not_store_content():
+    refs = [chunk_ref(c) for c in RETRIEVED]
+    assert "FULL ULTIMATE TEXT" not in json.dumps(refs)
+    assert refs[0] == {"type": "parent", "sport": "NBA", "similarity": 0.9123, "parent_id": "ultimate_parent"}
+
+def test_resolve_round_trips_retrieval_results():
+    resolved = resolve_chunks([chunk_ref(c) for c in RETRIEVED], COLLECTION, PARENTS)
+    assert [c["content"] for c in resolved] == [c["content"] for c in RETRIEVED]
+    assert [(c["type"], c["package"]) for c in resolved] == [("parent", "ultimate"), ("chunk", "nba_package.md")]
+
+def test_resolve_skips_missing_refs():
+    refs = [{"type": "chunk", "chunk_id": "gone", "sport": "NBA", "similarity": 0.5},
+            {"type": "parent", "parent_id": "gone", "sport": "NBA", "similarity": 0.5}]
+    assert resolve_chunks(refs, COLLECTION, PARENTS) == []
+
+def test_lookup_and_version_check(tmp_path):
+    version = collection_version(COLLECTION, PARENTS, "e5-base", 2)
+    index = FAQIndex(version)
+    index.add("NBA", "pricing", "ราคาแพ็กเกจ NBA เท่าไหร่", [1.0, 0.0], RETRIEVED)
+    path = tmp_path / "faq_index.json"
+    index.save(path)
+
+    loaded = FAQIndex.load(path, version)
+    assert loaded.lookup("nba", " Pricing", [0.99, 0.05]) is not None
+    assert loaded.lookup("NBA", "pricing", [0.0, 1.0]) is None
+    assert loaded.lookup("NBA", None, [1.0, 0.0]) is None
+    assert FAQIndex.load(path, "other-version") is None
+
+def test_empty_entries_are_not_stored():
+    index = FAQIndex("v")
+    index.add("NBA", "support", "q", [1.0, 0.0], [])
+    assert len(index) == 0
+    assert index.lookup("NBA", "support", [1.0, 0.0]) is None
+
+def test_version_covers_embedding_model_and_dimension():
+    base = collection_version(COLLECTION, PARENTS, "e5-base", 768)
+    assert collection_version(COLLECTION, PARENTS, "e5-large", 768) != base
+    assert collection_version(COLLECTION, PARENTS, "e5-base", 1024) != base
+
+def test_lookup_misses_on_embedding_length_mismatch():
+    index = FAQIndex("v")
+    index.add("NBA", "pricing", "q", [1.0, 0.0], RETRIEVED)
+    assert index.lookup("NBA", "pricing", [1.0, 0.0, 0.0]) is None
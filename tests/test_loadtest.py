@@ -0,0 +1,98 @@
+from rag.chatbot import llm_client as llm_module
+from rag.chatbot.llm_client import LLMClient
+from rag.chatbot.resilience import TokenBucket
+from rag.chatbot.rewriter import CombinedRewriter
+from rag.loadtest.driver import DEFAULT_SESSIONS, find_saturation, run_load, sessions_for_level, vary_session
+from rag.loadtest.fake_llm import FakeChatCompletions, LatencyModel, fake_openai_client
+
+ZERO = LatencyModel.parse("constant:0")
+
+def make_client(error_rate=0.0):
+    completions = FakeChatCompletions(ZERO, ZERO, error_rate=error_rate)
+    client = LLMClient(model_name="test-model", client=fake_openai_client(completions))
+    client.rate_limiter = TokenBucket(0, 1)
+    return client, completions
+
+def test_fake_provider_answers_rewriter_with_sticky_sport():
+    client, _ = make_client()
+    analysis = CombinedRewriter(client).analyze_and_rewrite("ราคาเท่าไหร่", [], active_sport="NBA")
+    assert analysis["intent"] == "pricing"
+    assert analysis["sport"] == "None"
+    assert "NBA" in analysis["rewritten_query"]
+
+def test_injected_429s_go_through_retry_and_spare_the_breaker(monkeypatch):
+    monkeypatch.setattr(llm_module.time, "sleep", lambda s: None)
+    client, completions = make_client(error_rate=1.0)
+    result = client.generate([{"role": "user", "content": "hi"}])
+    assert result.error_type == "rate_limited"
+    assert completions.calls == client.max_retries + 1
+    assert not client.breaker.is_open
+
+def test_sessions_scale_with_load():
+    assert sessions_for_level(50, concurrency=4) == 50
+    assert sessions_for_level(50, concurrency=64) == 256
+    assert sessions_for_level(50, arrival_rate=20) == 200
+
+class CountingTarget:
+    def start_session(self):
+        return []
+
+    def turn(self, session, message):
+        session.append(message)
+        return True, {"rewrite": 0.001, "total": 0.002}
+
+def test_run_load_reports_all_turns():
+    report = run_load(CountingTarget(), [["a", "b"], ["c"]], num_sessions=10, concurrency=3)
+    assert report["sessions"] == 10
+    assert report["errors"] == 0
+    assert set(report["latency_s"]) == {"rewrite", "total"}
+
+def report(level, throughput, p95):
+    return {"concurrency": level, "throughput_turns_per_s": throughput, "latency_s": {"total": {"p95": p95}}}
+
+def test_find_saturation():
+    reports = [report(1, 2.0, 1.0), report(4, 7.5, 1.1), report(16, 7.8, 4.0), report(64, 7.9, 15.0)]
+    assert find_saturation(reports)["concurrency"] == 4
+    assert find_saturation(reports[:2]) is None
+
+def test_injected_provider_needs_no_credentials(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    client, _ = make_client()
+    assert client.generate([{"role": "user", "content": "hi"}]).ok
+
+class ClientTarget:
+    """Rewrite + answer per turn through a real LLMClient and the fake provider."""
+    def __init__(self, client, completions):
+        self.client = client
+        self.completions = completions
+        self.rewriter = CombinedRewriter(client)
+
+    def llm_counts(self):
+        return self.client.requests, self.completions.calls
+
+    def start_session(self):
+        return []
+
+    def turn(self, history, message):
+        self.rewriter.analyze_and_rewrite(message, history)
+        result = self.client.generate([{"role": "user", "content": message}])
+        history.append({"role": "user", "content": message})
+        return result.ok, {}
+
+def test_vary_session_makes_turns_unique():
+    turns = DEFAULT_SESSIONS[0]
+    assert vary_session(turns, 1) != vary_session(turns, 2)
+    assert all("ราคาเท่าไหร่" in t for t in vary_session(["ราคาเท่าไหร่"], 7))
+
+def test_unique_sessions_defeat_single_flight_and_ratio_is_reported():
+    completions = FakeChatCompletions(LatencyModel.parse("constant:0.05"), LatencyModel.parse("constant:0.05"))
+    client = LLMClient(model_name="test-model", client=fake_openai_client(completions))
+    client.rate_limiter = TokenBucket(0, 1)
+    target = ClientTarget(client, completions)
+
+    merged = run_load(target, [["แพ็กเกจ NBA มีอะไรบ้าง"]], num_sessions=16, concurrency=16)
+    assert merged["provider_calls"] < merged["llm_requests"] == 32
+
+    unique = run_load(target, [["แพ็กเกจ NBA มีอะไรบ้าง"]], num_sessions=16, concurrency=16, unique_sessions=True)
+    assert unique["provider_calls"] == unique["llm_requests"] == 32
+    assert unique["provider_calls_per_request"] == 1.0
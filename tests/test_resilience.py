@@ -0,0 +1,208 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from rag.chatbot import llm_client as llm_module
+from rag.chatbot.llm_client import LLMClient
+from rag.chatbot.resilience import CircuitBreaker, SingleFlight, TokenBucket, backoff_delay
+
+def response(status, headers=None):
+    # Minimal stand-in for the SDK's HTTP response (httpx/httpx2 depending on openai version)
+    return SimpleNamespace(status_code=status, headers=headers or {}, request=None)
+
+def rate_limit_error(retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    return openai.RateLimitError("429", response=response(429, headers), body=None)
+
+def server_error():
+    return openai.InternalServerError("500", response=response(500), body=None)
+
+def bad_request():
+    return openai.BadRequestError("400", response=response(400), body=None)
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class StubCompletions:
+    """Provider stub: replays `outcomes` (exceptions are raised, strings returned as completions)."""
+    def __init__(self, outcomes, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return completion(outcome)
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(llm_module.time, "sleep", recorded.append)
+    return recorded
+
+def make_client(outcomes, delay=0.0):
+    client = LLMClient(api_key="test-key", model_name="test-model")
+    client.rate_limiter = TokenBucket(0, 1)
+    stub = StubCompletions(outcomes, delay)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=stub))
+    return client, stub
+
+# ===== CircuitBreaker =====
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+def test_breaker_half_open_allows_one_probe_then_closes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+def test_breaker_release_frees_probe_without_closing():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.is_open
+    assert breaker.allow()
+
+# ===== SingleFlight / TokenBucket / backoff =====
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def work():
+        calls.append(1)
+        gate.wait(1)
+        return "shared"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["shared"] * 8
+
+def test_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.do("k", lambda: "ok") == "ok"
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, 0.5, 2.0) <= 2.0 for attempt in range(10))
+
+# ===== LLMClient retry classification =====
+
+def test_generate_success(sleeps):
+    client, stub = make_client(["hello"])
+    result = client.generate([{"role": "user", "content": "hi"}])
+    assert result.ok and result.content == "hello" and result.attempts == 1
+
+def test_generate_retries_transient_errors(sleeps):
+    client, stub = make_client([server_error(), rate_limit_error(), "ok"])
+    result = client.generate([{"role": "user", "content": "hi"}])
+    assert result.ok and result.attempts == 3
+    assert len(sleeps) == 2
+
+def test_generate_does_not_retry_bad_request(sleeps):
+    client, stub = make_client([bad_request()])
+    result = client.generate([{"role": "user", "content": "hi"}])
+    assert not result.ok and result.error_type == "provider_error"
+    assert stub.calls == 1 and not sleeps
+    assert not client.breaker.is_open
+
+def test_generate_gives_up_after_max_retries(sleeps):
+    client, stub = make_client([server_error()])
+    result = client.generate([{"role": "user", "content": "hi"}])
+    assert result.error_type == "server"
+    assert stub.calls == client.max_retries + 1
+
+def test_breaker_counts_one_failure_per_request(sleeps):
+    client, stub = make_client([server_error()])
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client.generate([{"role": "user", "content": "a"}])
+    assert not client.breaker.is_open
+    client.generate([{"role": "user", "content": "b"}])
+    assert client.breaker.is_open
+    result = client.generate([{"role": "user", "content": "c"}])
+    assert result.error_type == "circuit_open"
+
+def test_rate_limits_never_open_breaker(sleeps):
+    client, stub = make_client([rate_limit_error()])
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    for i in range(3):
+        result = client.generate([{"role": "user", "content": str(i)}])
+        assert result.error_type == "rate_limited"
+    assert not client.breaker.is_open
+
+def test_retry_after_is_honoured_up_to_backoff_max(sleeps):
+    client, stub = make_client([rate_limit_error(retry_after=2), "ok"])
+    assert client.generate([{"role": "user", "content": "hi"}]).ok
+    assert sleeps[0] >= 2
+
+def test_retry_after_beyond_backoff_max_gives_up(sleeps):
+    client, stub = make_client([rate_limit_error(retry_after=600), "ok"])
+    result = client.generate([{"role": "user", "content": "hi"}])
+    assert result.error_type == "rate_limited"
+    assert stub.calls == 1 and not sleeps
+
+def test_identical_concurrent_requests_share_one_call():
+    client, stub = make_client(["shared"], delay=0.1)
+    results = []
+    messages = [{"role": "user", "content": "same"}]
+    threads = [threading.Thread(target=lambda: results.append(client.generate(messages))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stub.calls == 1
+    assert [r.content for r in results] == ["shared"] * 5
+
+def test_half_open_probe_may_retry_and_closes_breaker(sleeps):
+    client, stub = make_client([server_error(), "ok"])
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    client.breaker.record_failure()
+    result = client.generate([{"role": "user", "content": "probe"}])
+    assert result.ok and result.attempts == 2
+    assert not client.breaker.is_open
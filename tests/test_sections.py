@@ -0,0 +1,132 @@
+import pytest
+
+from rag.ingestion.chunker import MarkdownChunker
+from rag.ingestion.sections import parse_sections, section_headers, split_span, trim_span
+
+DOC = """intro line
+
+# Title
+
+## Pricing
+Monthly 299 THB
+
+### Promo
+First month free
+
+## Support
+Call 1175
+"""
+
+def titles(text):
+    return [(s["level"], s["title"]) for s in parse_sections(text)]
+
+# ===== parse_sections =====
+
+def test_sections_cover_text_contiguously():
+    sections = parse_sections(DOC)
+    assert sections[0]["start"] == 0
+    assert sections[-1]["end"] == len(DOC)
+    for prev, cur in zip(sections, sections[1:]):
+        assert prev["end"] == cur["start"]
+
+def test_section_offsets_start_at_header():
+    for s in parse_sections(DOC)[1:]:
+        assert DOC[s["start"]:s["end"]].startswith("#" * s["level"] + " " + s["title"])
+
+def test_section_paths():
+    paths = [s["path"] for s in parse_sections(DOC)]
+    assert paths[0] == []
+    assert paths[3] == [(1, "Title"), (2, "Pricing"), (3, "Promo")]
+    assert paths[4] == [(1, "Title"), (2, "Support")]
+    assert section_headers(paths[3]) == (["Pricing"], ["Promo"])
+
+def test_header_title_must_be_on_same_line():
+    assert titles("##\nจุดเด่น") == [(0, "")]
+    assert titles("### \n\nfoo") == [(0, "")]
+
+def test_header_keeps_hash_in_title():
+    assert titles("## C#\nbody") == [(2, "C#")]
+    assert titles("## Closed ##\nbody") == [(2, "Closed")]
+
+def test_deeper_headers_are_body():
+    assert titles("## A\n#### deep\ntext") == [(2, "A")]
+
+def test_headers_in_fenced_code_are_ignored():
+    text = "## Setup\n```bash\n# install\npip install x\n```\n~~~\n## not a header\n~~~\nafter\n## Next\n"
+    assert titles(text) == [(2, "Setup"), (2, "Next")]
+
+def test_unclosed_fence_swallows_rest():
+    assert titles("## A\n```\n## B\n") == [(2, "A")]
+
+# ===== trim_span / split_span =====
+
+def test_trim_span():
+    text = "  \n hello \n\n"
+    start, end = trim_span(text, 0, len(text))
+    assert text[start:end] == "hello"
+    assert trim_span("   ", 0, 3) == (3, 3)
+
+def test_split_span_respects_size_and_covers_span():
+    text = "\n".join(f"line {i} " + "x" * 40 for i in range(100))
+    windows = split_span(text, 0, len(text), chunk_size=500, chunk_overlap=100)
+    assert windows[0][0] == 0
+    assert windows[-1][1] == len(text)
+    for (s1, e1), (s2, e2) in zip(windows, windows[1:]):
+        assert e1 - s1 <= 500
+        assert s1 < s2 <= e1  # progress, no gaps
+        assert e1 - s2 <= 100  # overlap bounded
+        assert text[s2 - 1] == "\n"  # overlap snapped to a line start
+
+def test_split_span_without_overlap_is_disjoint():
+    text = "word " * 400
+    windows = split_span(text, 0, len(text), chunk_size=300, chunk_overlap=0)
+    for (_, e1), (s2, _) in zip(windows, windows[1:]):
+        assert s2 == e1
+
+def test_split_span_without_boundaries_hard_cuts():
+    text = "x" * 1000
+    windows = split_span(text, 0, len(text), chunk_size=300, chunk_overlap=50)
+    assert all(e - s <= 300 for s, e in windows)
+    assert windows[-1][1] == 1000
+
+# ===== MarkdownChunker.split_text =====
+
+def test_split_text_spans_are_trimmed_source_slices():
+    spans = MarkdownChunker(chunk_size=1000, chunk_overlap=100).split_text(DOC)
+    for span in spans:
+        chunk = DOC[span["start"]:span["end"]]
+        assert chunk == chunk.strip() and chunk
+
+def test_split_text_packs_siblings_under_same_h2():
+    spans = MarkdownChunker(chunk_size=1000, chunk_overlap=100).split_text(DOC)
+    chunks = [DOC[s["start"]:s["end"]] for s in spans]
+    assert chunks[0] == "intro line\n\n# Title"
+    assert chunks[1] == "## Pricing\nMonthly 299 THB\n\n### Promo\nFirst month free"
+    assert spans[1]["path"] == [(1, "Title"), (2, "Pricing"), (3, "Promo")]
+    assert chunks[2] == "## Support\nCall 1175"
+
+def test_split_text_only_overlaps_oversized_sections():
+    body = "\n".join("รายละเอียดแพ็กเกจ " * 5 for _ in range(40))
+    text = f"## Small\nshort\n\n## Big\n{body}\n\n## Tail\nend"
+    spans = MarkdownChunker(chunk_size=600, chunk_overlap=120).split_text(text)
+
+    big = [s for s in spans if s["path"] == [(2, "Big")]]
+    assert len(big) > 1
+    assert all(s["end"] - s["start"] <= 600 for s in big)
+    assert any(b["start"] < a["end"] for a, b in zip(big, big[1:]))
+
+    small, tail = spans[0], spans[-1]
+    assert text[small["start"]:small["end"]] == "## Small\nshort"
+    assert text[tail["start"]:tail["end"]] == "## Tail\nend"
+    assert small["end"] <= big[0]["start"] and big[-1]["end"] <= tail["start"]
+
+def test_split_text_keeps_code_block_with_its_section():
+    text = "## Install\n```\n# comment\nrun\n```\ndone\n## Next\nx"
+    spans = MarkdownChunker(chunk_size=1000, chunk_overlap=0).split_text(text)
+    assert text[spans[0]["start"]:spans[0]["end"]] == "## Install\n```\n# comment\nrun\n```\ndone"
+
+def test_chunker_rejects_overlap_not_smaller_than_size():
+    with pytest.raises(ValueError):
+        MarkdownChunker(chunk_size=300, chunk_overlap=300)
+    with pytest.raises(ValueError):
+        MarkdownChunker(chunk_size=300, chunk_overlap=500)